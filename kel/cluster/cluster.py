@@ -1,14 +1,30 @@
-import base64
 import collections
 import concurrent.futures
+import functools
 import importlib
 import logging
 
+import pykube
+import requests.adapters
+
 from jinja2 import Template
 
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 
 logger = logging.getLogger(__name__)
 
+# compiled manifest templates keyed by their base64 encoded source
+_template_cache = {}
+
+
+@functools.lru_cache()
+def b64(s):
+    return base64.b64encode(s.encode("utf-8")).decode("ascii")
+
 
 class Cluster:
 
@@ -28,15 +44,23 @@ class Cluster:
             ),
         )
         self.provider = self.provider_module.setup(**config["layer-0"]["provider"])
-
-    def get_provider_resource(self, name):
-        mapping = {
+        self.resource_factories = {
             "network": self.provider_module.Network,
             "etcd": self.provider_module.EtcdCluster,
             "master": self.provider_module.MasterGroup,
             "nodes": ClusterNodes(self.provider_module.NodeGroup),
         }
-        return mapping[name](self.provider, self, self.config["layer-0"]["resources"][name])
+        self.provider_resources = {}
+        self.manifest_ctx = {
+            "cluster": self,
+            "b64": b64,
+        }
+
+    def get_provider_resource(self, name):
+        if name not in self.provider_resources:
+            factory = self.resource_factories[name]
+            self.provider_resources[name] = factory(self.provider, self, self.config["layer-0"]["resources"][name])
+        return self.provider_resources[name]
 
     @property
     def node_token(self):
@@ -62,17 +86,58 @@ class Cluster:
     def router_ip(self, value):
         self.config["layer-1"]["resources"]["router-ip"] = value
 
+    def build_kube_config(self):
+        return pykube.KubeConfig({
+            "clusters": [
+                {
+                    "name": self.config["name"],
+                    "cluster": {
+                        "server": "https://{}".format(self.master_ip),
+                    },
+                },
+            ],
+            "users": [
+                {
+                    "name": self.config["name"],
+                    "user": {},  # @@@ kubeadm
+                },
+            ],
+            "contexts": [
+                {
+                    "name": self.config["name"],
+                    "context": {
+                        "cluster": self.config["name"],
+                        "user": self.config["name"],
+                    },
+                }
+            ],
+            "current-context": self.config["name"],
+        })
+
+    @property
+    def kube_api(self):
+        # a single client shared by every Kubernetes resource lets them
+        # reuse pooled keep-alive connections to the master
+        if not hasattr(self, "_kube_api"):
+            api = pykube.HTTPClient(self.build_kube_config())
+            api.session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32))
+            self._kube_api = api
+        return self._kube_api
+
     def get_etcd_endpoints(self):
         return self.get_provider_resource("etcd").get_initial_endpoints()
 
     def decode_manifest(self, data, ctx=None):
         if ctx is None:
             ctx = {}
-        ctx.update({
-            "cluster": self,
-            "b64": lambda s: base64.b64encode(s.encode("utf-8")).decode("ascii"),
-        })
-        return Template(base64.b64decode(data).decode("utf-8")).render(ctx)
+        return self.get_template(data).render(ctx, **self.manifest_ctx)
+
+    def get_template(self, data):
+        template = _template_cache.get(data)
+        if template is None:
+            template = Template(base64.b64decode(data).decode("utf-8"))
+            _template_cache[data] = template
+        return template
 
     def create(self):
         with concurrent.futures.ThreadPoolExecutor() as executor:
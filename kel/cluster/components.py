@@ -1,4 +1,6 @@
 import collections
+import concurrent.futures
+import copy
 import hashlib
 import json
 import logging
@@ -8,74 +10,78 @@ import pykube
 import pykube.objects
 import yaml
 
+try:
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
+
 
 logger = logging.getLogger(__name__)
 
+# manifest document "kind" to pykube object class
+_api_object_kinds = {
+    cls.kind: cls
+    for cls in vars(pykube.objects).values()
+    if isinstance(cls, type) and issubclass(cls, pykube.objects.APIObject) and getattr(cls, "kind", None)
+}
+
 
 class KubernetesResource:
 
     def __init__(self, cluster):
         self.cluster = cluster
-        self.kubeconfig = self.build_kube_config()
-        self.api = pykube.HTTPClient(self.kubeconfig)
-
-    def build_kube_config(self):
-        return pykube.KubeConfig({
-            "clusters": [
-                {
-                    "name": self.cluster.config["name"],
-                    "cluster": {
-                        "server": "https://{}".format(self.cluster.master_ip),
-                    },
-                },
-            ],
-            "users": [
-                {
-                    "name": self.cluster.config["name"],
-                    "user": {},  # @@@ kubeadm
-                },
-            ],
-            "contexts": [
-                {
-                    "name": self.cluster.config["name"],
-                    "context": {
-                        "cluster": self.cluster.config["name"],
-                        "user": self.cluster.config["name"],
-                    },
-                }
-            ],
-            "current-context": self.cluster.config["name"],
-        })
+        self._docs_cache = {}
+        self.api = cluster.kube_api
+        self.kubeconfig = self.api.config
 
-    def get_api_objs(self, group, manifest, ctx=None):
+    def get_manifest_docs(self, group, manifest, ctx=None):
         if ctx is None:
             ctx = {}
         ctx = self.get_manifest_ctx(group, manifest, **ctx)
-        docs = yaml.load_all(
-            self.cluster.decode_manifest(
-                self.cluster.config["release"][group]["manifests"][manifest],
-                ctx,
-            )
-        )
+        data = self.cluster.config["release"][group]["manifests"][manifest]
+        # templates may also read cluster state (master_ip, router_ip, etcd
+        # endpoints); the cache assumes that state does not change for the
+        # life of this resource
+        key = (group, manifest, data, json.dumps(ctx, sort_keys=True, default=repr))
+        if key not in self._docs_cache:
+            self._docs_cache[key] = list(yaml.load_all(
+                self.cluster.decode_manifest(data, ctx),
+                Loader=YAMLLoader,
+            ))
+        return self._docs_cache[key]
+
+    def get_api_objs(self, group, manifest, ctx=None, probe=False):
+        # copy the cached docs; callers are free to mutate the objects
+        docs = copy.deepcopy(self.get_manifest_docs(group, manifest, ctx))
         objs = collections.defaultdict(list)
         for doc in docs:
-            obj = getattr(pykube.objects, doc["kind"])(self.api, doc)
-            if obj.exists():
-                obj.reload()
-                # set the shadow object to the original doc enabling proper
-                # update handling if the object has changed in the manifest
-                obj.obj = doc
+            obj = _api_object_kinds[doc["kind"]](self.api, doc)
+            if probe:
+                r = self.api.get(**obj.api_kwargs())
+                if r.status_code != 404:
+                    self.api.raise_for_status(r)
+                    obj.set_obj(r.json())
+                    # set the shadow object to the original doc enabling proper
+                    # update handling if the object has changed in the manifest
+                    obj.obj = doc
             objs[doc["kind"]].append(obj)
         return objs
 
     def generate_deployment_key(self, objs):
-        serialized = "".join([json.dumps(r.obj, sort_keys=True) for r in objs])
-        return hashlib.sha1(serialized.encode("ascii")).hexdigest()[:8]
+        h = hashlib.sha1()
+        for r in objs:
+            h.update(json.dumps(r.obj, sort_keys=True).encode("ascii"))
+        return h.hexdigest()[:8]
 
-    def delete_namespace(self, obj):
+    def delete_namespace(self, obj, timeout=600):
         obj.delete()
+        delay = 0.1
+        deadline = time.monotonic() + timeout
         while obj.exists():
-            time.sleep(1)
+            if time.monotonic() >= deadline:
+                raise Exception('timed out waiting for "{}" namespace to be deleted'.format(obj.name))
+            time.sleep(delay)
+            delay = min(delay * 1.5, 5.0)
 
     def get_manifest_ctx(self, group, manifest, **ctx):
         image = self.cluster.config["release"][group].get("images", {}).get(manifest)
@@ -107,9 +113,11 @@ class ComponentResource(KubernetesResource):
             ctx["bundle"] = self.cluster.config["release"][group]["bundles"][self.bundle]
         return ctx
 
-    def generate_deployment_key(self):
-        deployment = self.get_api_objs(self.group, self.manifest)["Deployment"][0]
-        secrets = self.get_api_objs(self.group, self.manifest)["Secret"]
+    def generate_deployment_key(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        deployment = api_objs["Deployment"][0]
+        secrets = api_objs["Secret"]
         objs = [deployment]
         for volume in deployment.obj["spec"]["template"]["spec"].get("volumes", []):
             if "secret" in volume:
@@ -119,49 +127,60 @@ class ComponentResource(KubernetesResource):
                 objs.append(secret)
         return super(ComponentResource, self).generate_deployment_key(objs)
 
-    def get_deployment(self):
-        deployment = self.get_api_objs(self.group, self.manifest)["Deployment"][0]
-        key = self.generate_deployment_key()
+    def get_deployment(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        deployment = api_objs["Deployment"][0]
+        key = self.generate_deployment_key(api_objs)
         deployment.obj["metadata"]["labels"]["deployment"] = key
         return deployment
 
-    def create_service(self):
-        objs = self.get_api_objs(self.group, self.manifest)["Service"]
+    def create_object(self, obj, kind):
+        if not obj.exists():
+            obj.create()
+            logger.info('created "{}" {}'.format(obj.name, kind))
+
+    def _submit_create_objects(self, executor, objs, kind):
+        fs = []
         for obj in objs:
-            if not obj.exists():
-                obj.create()
-                logger.info('created "{}" service'.format(obj.name))
+            fs.append(executor.submit(self.create_object, obj, kind))
+        return fs
 
-    def create_deployment(self):
-        deployment = self.get_deployment()
+    def create_service(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        for obj in api_objs["Service"]:
+            self.create_object(obj, "service")
+
+    def create_deployment(self, api_objs=None):
+        deployment = self.get_deployment(api_objs)
         if not deployment.exists():
             deployment.create()
             logger.info('created "{}" deployment'.format(deployment.name))
 
-    def create_secrets(self):
-        objs = self.get_api_objs(self.group, self.manifest)["Secret"]
-        for obj in objs:
-            if not obj.exists():
-                obj.create()
-                logger.info('created "{}" secret'.format(obj.name))
-
-    def has_secrets(self):
-        return bool(self.get_api_objs(self.group, self.manifest)["Secret"])
-
-    def has_service(self):
-        return bool(self.get_api_objs(self.group, self.manifest)["Service"])
+    def create_secrets(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        for obj in api_objs["Secret"]:
+            self.create_object(obj, "secret")
 
     @property
     def current_deployment(self):
         if not hasattr(self, "_current_deployment"):
-            deployment = self.get_api_objs(self.group, self.manifest)["Deployment"][0]
+            # only the manifest metadata is needed to query for the running
+            # deployment; read it from the parsed docs without building objects
+            docs = self.get_manifest_docs(self.group, self.manifest)
+            deployment = next((doc for doc in docs if doc["kind"] == "Deployment"), None)
+            if deployment is None:
+                raise Exception('"{}" manifest does not define a deployment'.format(self.manifest))
+            metadata = deployment["metadata"]
             self._current_deployment = (
                 pykube.Deployment
                 .objects(self.api)
                 .filter(
-                    namespace=deployment.namespace,
+                    namespace=metadata.get("namespace") or self.api.config.namespace,
                     selector={
-                        "kelproject.com/name": deployment.obj["metadata"]["labels"]["kelproject.com/name"]
+                        "kelproject.com/name": metadata["labels"]["kelproject.com/name"]
                     }
                 )
                 .get()
@@ -172,18 +191,30 @@ class ComponentResource(KubernetesResource):
         key = self.generate_deployment_key()
         return key != self.current_deployment.obj["metadata"]["labels"]["deployment"]
 
-    def create(self):
+    def create(self, executor=None):
+        if executor is None:
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                return self._create(executor)
+        return self._create(executor)
+
+    def _create(self, executor):
         if self.disk:
             self.cluster.provider.create_disk(
                 "{}-{}".format(self.cluster.config["name"], self.disk.get("name", self.manifest)),
                 self.disk["size"],
                 self.disk["type"],
             )
-        if self.has_secrets():
-            self.create_secrets()
-        if self.has_service():
-            self.create_service()
-        self.create_deployment()
+        api_objs = self.get_api_objs(self.group, self.manifest)
+        # key the deployment before any create replaces the manifest objects
+        # with the server's copy
+        deployment = self.get_deployment(api_objs)
+        fs = []
+        fs.extend(self._submit_create_objects(executor, api_objs["Secret"], "secret"))
+        fs.extend(self._submit_create_objects(executor, api_objs["Service"], "service"))
+        # the deployment may reference any of these; surface failures first
+        for f in fs:
+            f.result()
+        self.create_object(deployment, "deployment")
 
     def upgrade(self):
         if not self.can_upgrade():
@@ -194,36 +225,38 @@ class ComponentResource(KubernetesResource):
         deployment.update()
 
     def update_secrets(self):
-        if self.has_secrets():
-            secrets = self.get_api_objs(self.group, self.manifest)["Secret"]
-            for secret in secrets:
-                secret.update()
+        secrets = self.get_api_objs(self.group, self.manifest, probe=True)["Secret"]
+        for secret in secrets:
+            secret.update()
 
     def destroy(self):
-        self.destroy_deployment()
-        if self.has_service():
-            self.destroy_service()
-        if self.has_secrets():
-            self.destroy_secrets()
+        api_objs = self.get_api_objs(self.group, self.manifest)
+        self.destroy_deployment(api_objs)
+        self.destroy_service(api_objs)
+        self.destroy_secrets(api_objs)
         # @@@ leave disk around and let this be a cluster admin concern
         # we will want this to be an option eventually (think testing)
         # if self.disk:
         #     self.cluster.provider.destroy_disk("{}-{}".format("{}-{}".format(self.cluster.config["name"], self.disk.get("name", self.manifest))))
 
-    def destroy_service(self):
-        objs = self.get_api_objs(self.group, self.manifest)["Service"]
-        for obj in objs:
+    def destroy_service(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        for obj in api_objs["Service"]:
             obj.delete()
             logger.info('destroyed "{}" service'.format(obj.name))
 
-    def destroy_deployment(self):
-        obj = self.get_api_objs(self.group, self.manifest)["Deployment"][0]
+    def destroy_deployment(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        obj = api_objs["Deployment"][0]
         self.delete_deployment(obj)
         logger.info('destroyed "{}" deployment'.format(obj.name))
 
-    def destroy_secrets(self):
-        objs = self.get_api_objs(self.group, self.manifest)["Secret"]
-        for obj in objs:
+    def destroy_secrets(self, api_objs=None):
+        if api_objs is None:
+            api_objs = self.get_api_objs(self.group, self.manifest)
+        for obj in api_objs["Secret"]:
             obj.delete()
             logger.info('destroyed "{}" secret'.format(obj.name))
 
@@ -287,9 +320,9 @@ class Router(ComponentResource):
             attached_ig="{}-node-1x-nodes".format(self.cluster.config["name"])  # @@@ fix hardcoded value
         )
 
-    def create(self):
+    def create(self, executor=None):
         self.create_loadbalancer()
-        super(Router, self).create()
+        super(Router, self).create(executor)
 
     def destroy(self):
         super(Router, self).destroy()
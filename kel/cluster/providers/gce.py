@@ -801,8 +801,12 @@ class MasterGroup(GCEResource):
 
     def destroy(self, executor):
         self.destroy_instance_group()
-        self.destroy_instance_template()
-        self.destroy_loadbalancer()
+        # with the group gone nothing references the template or target pool
+        fs = []
+        fs.append(executor.submit(self.destroy_instance_template))
+        fs.append(executor.submit(self.destroy_loadbalancer))
+        for f in fs:
+            f.result()
 
     def destroy_loadbalancer(self):
         self.destroy_forwarding_rule()
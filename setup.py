@@ -22,7 +22,8 @@ setup(
         "google-api-python-client",
         "Jinja2",
         "pykube",
-        "PyYAML"
+        "PyYAML",
+        "requests"
     ],
     zip_safe=False
 )